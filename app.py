@@ -1,6 +1,14 @@
 import os
+
+# One BLAS thread per worker process (set before NumPy is imported) so
+# multiple uvicorn workers don't oversubscribe the CPU
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
 import json
-from datetime import datetime
+import uuid
+import asyncio
+import orjson
 from typing import Dict, Any, List
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
@@ -10,6 +18,7 @@ from openai import OpenAI
 
 from diabetes_tool import predict_diabetes_tool
 from retrieval_tool import retrieve_documents_tool
+from llm_cache import get_cached_response, store_cached_response
 
 
 # -------------------------------------------------
@@ -18,6 +27,7 @@ from retrieval_tool import retrieve_documents_tool
 load_dotenv(override=True)
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+CHAT_MODEL = "gpt-5-nano-2025-08-07"
 
 app = FastAPI()
 app.add_middleware(
@@ -28,15 +38,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# -------------------------------------------------
-# JSON Encoder
-# -------------------------------------------------
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
 # -------------------------------------------------
 # Tools (OpenAI format)
 # -------------------------------------------------
@@ -127,28 +128,31 @@ TOOLS = [
    
 ]
 
+# Serialized once for the response-cache key
+TOOLS_JSON = orjson.dumps(TOOLS, option=orjson.OPT_SORT_KEYS)
+
 # -------------------------------------------------
 # Tool Executor
 # -------------------------------------------------
-def execute_tool(name: str, arguments: Dict[str, Any]) -> str:
+async def execute_tool(name: str, arguments: Dict[str, Any]) -> str:
     if name == "predict_diabetes":
-        return predict_diabetes_tool(**arguments)
+        # CPU-bound; keep it off the event loop so other tools can overlap
+        return await asyncio.to_thread(predict_diabetes_tool, **arguments)
     elif name == "retrieve_documents":
-        return retrieve_documents_tool(**arguments)
+        return await retrieve_documents_tool(**arguments)
 
     return "Unknown tool"
 
 # -------------------------------------------------
-# WebSocket Chat
+# System Prompt
 # -------------------------------------------------
-@app.websocket("/ws/chat")
-async def chat_ws(websocket: WebSocket):
-    await websocket.accept()
-
-    messages: List[Dict[str, Any]] = [
-        {
-            "role": "system",
-            "content": """You are an AI Assistant designed to answer Medical and Aviation-related queries clearly, safely, and concisely.
+# Kept as one module-level constant and always sent first, so every request
+# starts with a byte-identical prefix. OpenAI caches prompt prefixes of
+# 1024+ tokens automatically; this prompt sits below that threshold today,
+# so only grow it with invariant instructions.
+SYSTEM_MSG: Dict[str, Any] = {
+    "role": "system",
+    "content": """You are an AI Assistant designed to answer Medical and Aviation-related queries clearly, safely, and concisely.
 
 =====================
 CORE ROUTING RULES
@@ -201,16 +205,101 @@ OUTPUT STYLE
 - No unnecessary explanations.
 - Be crisp, minimal, and user-friendly.
 """
-        }
-    ]
+}
+
+# -------------------------------------------------
+# WebSocket Chat
+# -------------------------------------------------
+SEND_QUEUE_SIZE = 256
+SEND_BATCH_SIZE = 64
+
+async def receive(websocket: WebSocket) -> Any:
+    """
+    Read one JSON frame, text or binary, decoded with orjson
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+
+    raw = message.get("bytes")
+    if raw is None:
+        raw = message.get("text", "")
+
+    return orjson.loads(raw)
+
+@app.websocket("/ws/chat")
+async def chat_ws(websocket: WebSocket):
+    await websocket.accept()
+
+    session_id = str(uuid.uuid4())
+    messages: List[Dict[str, Any]] = [SYSTEM_MSG]
+
+    # Outgoing frames go through a queue; one writer task drains it and
+    # coalesces whatever is pending into a single frame (a JSON array)
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+
+    async def writer():
+        while True:
+            batch = [await outbox.get()]
+            while len(batch) < SEND_BATCH_SIZE:
+                try:
+                    batch.append(outbox.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            payload = batch[0] if len(batch) == 1 else batch
+            # orjson serializes datetimes natively; frames stay text for the client
+            await websocket.send_text(orjson.dumps(payload).decode())
+
+    writer_task = asyncio.create_task(writer())
+
+    def raise_if_writer_died():
+        # A failed send (e.g. client gone) ends the turn, like a direct send
+        if writer_task.done():
+            raise writer_task.exception() or WebSocketDisconnect()
 
     async def send(data):
-        await websocket.send_text(json.dumps(data, cls=DateTimeEncoder))
+        raise_if_writer_died()
+        try:
+            outbox.put_nowait(data)
+        except asyncio.QueueFull:
+            # Wait for room, but stop waiting if the writer dies meanwhile
+            put = asyncio.ensure_future(outbox.put(data))
+            await asyncio.wait({put, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not put.done():
+                put.cancel()
+            raise_if_writer_died()
+
+    async def run_tool(tool_call):
+        await send({
+            "role": "Thoughts",
+            "content": f"Executing tool: {tool_call.function.name} with arguments: {tool_call.function.arguments}",
+        })
+        tool_name = tool_call.function.name
+        tool_args = json.loads(tool_call.function.arguments)
+
+        tool_result = await execute_tool(tool_name, tool_args)
+        await send({
+            "role": "Thoughts",
+            "content": f"Got result from {tool_name}: {tool_result}",
+        })
+
+        return tool_call, tool_result
 
     try:
         while True:
-            user_data = await websocket.receive_json()
-            user_message = user_data["content"]
+            user_data = await receive(websocket)
+            user_message = (
+                user_data.get("content") if isinstance(user_data, dict)
+                else user_data
+            )
+            if not isinstance(user_message, str) or not user_message.strip():
+                # Always answer, so the client's typing indicator clears
+                await send({
+                    "role": "assistant",
+                    "content": "Empty or invalid message"
+                })
+                continue
 
             messages.append({"role": "user", "content": user_message})
 
@@ -218,15 +307,26 @@ OUTPUT STYLE
             # 🔁 Tool loop
             # -------------------------------------------------
             while True:
+                # Replay a cached answer when one exists
+                cached = await get_cached_response(messages, TOOLS_JSON, CHAT_MODEL)
+                if cached is not None:
+                    messages.append({"role": "assistant", "content": cached})
+                    await send({
+                        "role": "assistant",
+                        "content": cached
+                    })
+                    break
+
                 response = client.chat.completions.create(
-                    model="gpt-5-nano-2025-08-07",
+                    model=CHAT_MODEL,
                     messages=messages,
                     tools=TOOLS,
                     tool_choice="auto",
+                    # keep this session's turns on the same prompt-cache shard
+                    extra_body={"prompt_cache_key": session_id},
                 )
 
                 message = response.choices[0].message
-                print(message)
 
                 # -------------------------------------------------
                 # If tool is requested
@@ -234,23 +334,13 @@ OUTPUT STYLE
                 if message.tool_calls:
                     messages.append(message)
 
-                    for tool_call in message.tool_calls:
-                        await send({
-                            "role": "Thoughts",
-                            "content": f"Executing tool: {tool_call.function.name} with arguments: {tool_call.function.arguments}",
-                        })
-                        tool_name = tool_call.function.name
-                        print(tool_name)
-                        tool_args = json.loads(tool_call.function.arguments)
-                        print(tool_args)
-
-                        tool_result = execute_tool(tool_name, tool_args)
-                        await send({
-                            "role": "Thoughts",
-                            "content": f"Got result from {tool_name}: {tool_result}",
-                        })
-                        print(tool_result)
+                    # Independent tool calls run concurrently;
+                    # results are appended in the model's call order
+                    results = await asyncio.gather(*[
+                        run_tool(tool_call) for tool_call in message.tool_calls
+                    ])
 
+                    for tool_call, tool_result in results:
                         messages.append({
                             "role": "tool",
                             "tool_call_id": tool_call.id,
@@ -263,6 +353,8 @@ OUTPUT STYLE
                 # -------------------------------------------------
                 # Final assistant message
                 # -------------------------------------------------
+                if message.content:
+                    store_cached_response(messages, TOOLS_JSON, CHAT_MODEL, message.content)
                 messages.append(message)
                 await send({
                     "role": "assistant",
@@ -272,17 +364,21 @@ OUTPUT STYLE
 
     except WebSocketDisconnect:
         print("WebSocket disconnected")
+    finally:
+        writer_task.cancel()
+        # Retrieve the writer's exception so asyncio doesn't log it as unhandled
+        await asyncio.gather(writer_task, return_exceptions=True)
 
 
 from fastapi import UploadFile, File, Form
-import uuid
 import tempfile
-from pinecone import Pinecone, ServerlessSpec
+import threading
+from functools import cache
 
 from jina_vector_utils import (
     extract_text_from_pdf,
     chunk_text,
-    embed_texts_jina
+    aembed_texts_jina
 )
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
@@ -291,9 +387,15 @@ INDEX_NAME = os.getenv("PINECONE_INDEX", "medical-docs")
 # Jina v4 embedding dimension
 EMBEDDING_DIMENSION = 1024  
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
+_index_lock = threading.Lock()
 
-def get_or_create_index():
+# Created on first /ingest rather than at import, so chat-only workers
+# skip the Pinecone setup round-trips on cold start
+@cache
+def _create_index():
+    from pinecone import Pinecone, ServerlessSpec
+
+    pc = Pinecone(api_key=PINECONE_API_KEY)
     existing_indexes = [i["name"] for i in pc.list_indexes()]
 
     if INDEX_NAME not in existing_indexes:
@@ -312,8 +414,29 @@ def get_or_create_index():
 
     return pc.Index(INDEX_NAME)
 
-# Usage
-index = get_or_create_index()
+def get_or_create_index():
+    # cache() alone could let two first requests both try create_index
+    with _index_lock:
+        return _create_index()
+
+UPSERT_BATCH_SIZE = 100
+UPSERT_MAX_CONCURRENCY = 4
+
+async def upsert_vectors(vectors: List[Dict[str, Any]]) -> None:
+    """
+    Upsert in Pinecone-sized batches, several at a time, off the event loop
+    """
+    index = await asyncio.to_thread(get_or_create_index)
+    semaphore = asyncio.Semaphore(UPSERT_MAX_CONCURRENCY)
+
+    async def upsert_batch(batch):
+        async with semaphore:
+            await asyncio.to_thread(index.upsert, vectors=batch)
+
+    await asyncio.gather(*[
+        upsert_batch(vectors[i:i + UPSERT_BATCH_SIZE])
+        for i in range(0, len(vectors), UPSERT_BATCH_SIZE)
+    ])
 
 
 
@@ -344,25 +467,29 @@ async def ingest_data(
     # Chunk + Embed
     # ------------------------------
     chunks = chunk_text(text)
-    embeddings = embed_texts_jina(chunks)
+    embeddings = await aembed_texts_jina(chunks)
 
-    vectors = []
     total_chunks = len(chunks)
+    base_metadata = {
+        "document_id": document_id,
+        "total_chunks": total_chunks,
+        "source": source
+    }
 
-    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-        vectors.append({
+    vectors = [
+        {
             "id": f"{document_id}_{i}",
             "values": embedding,
             "metadata": {
-                "document_id": document_id,
+                **base_metadata,
                 "chunk_index": i,
-                "total_chunks": total_chunks,
-                "source": source,
                 "text": chunk[:500]  # preview only
             }
-        })
+        }
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ]
 
-    index.upsert(vectors)
+    await upsert_vectors(vectors)
 
     return {
         "status": "success",
@@ -377,4 +504,16 @@ async def ingest_data(
 # -------------------------------------------------
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8003)
+
+    # Chat state and caches are per process, so extra workers are safe:
+    # each websocket keeps its history on the connection that owns it
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8003,
+        loop="auto",  # uvloop when installed
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        ws_max_size=16 * 1024 * 1024,
+        ws_ping_interval=30,
+    )
@@ -0,0 +1,71 @@
+# Offline tool; neither package is a runtime dependency:
+#   pip install skl2onnx==1.19.1 onnxruntime==1.23.2
+# To serve the export, install onnxruntime==1.23.2 next to the app as well;
+# without it diabetes_tool keeps using diabetes_model.pkl
+import pickle
+import warnings
+
+import numpy as np
+import onnxruntime as ort
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+from diabetes_tool import MODEL_PATH, ONNX_MODEL_PATH, FEATURE_NAMES
+
+# Rows used to check the export matches sklearn before it is served
+SAMPLE_ROWS = np.array([
+    [6, 148, 72, 35, 0, 33.6, 0.627, 50],
+    [1, 85, 66, 29, 0, 26.6, 0.351, 31],
+    [8, 183, 64, 0, 0, 23.3, 0.672, 32],
+    [1, 89, 66, 23, 94, 28.1, 0.167, 21],
+    [0, 137, 40, 35, 168, 43.1, 2.288, 33],
+], dtype=np.float32)
+
+PROBABILITY_TOLERANCE = 1e-4
+
+# -------------------------------------------------
+# One-off export: diabetes_model.pkl -> diabetes_model.onnx
+# -------------------------------------------------
+def check_parity(model, onnx_bytes: bytes) -> None:
+    """
+    Raise if ONNX labels/probabilities differ from sklearn on SAMPLE_ROWS
+    """
+    session = ort.InferenceSession(onnx_bytes, providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    labels, probabilities = session.run(None, {input_name: SAMPLE_ROWS})
+
+    with warnings.catch_warnings():
+        # pickle was fit on a DataFrame; raw rows are fine here
+        warnings.simplefilter("ignore", UserWarning)
+        expected_labels = model.predict(SAMPLE_ROWS.astype(np.float64))
+        expected_probabilities = model.predict_proba(SAMPLE_ROWS.astype(np.float64))
+
+    if not np.array_equal(labels, expected_labels):
+        raise ValueError(f"Label mismatch: onnx={labels} sklearn={expected_labels}")
+
+    max_diff = float(np.abs(probabilities - expected_probabilities).max())
+    if max_diff > PROBABILITY_TOLERANCE:
+        raise ValueError(f"Probability mismatch: max diff {max_diff}")
+
+    print(f"✅ ONNX matches sklearn on {len(SAMPLE_ROWS)} rows (max diff {max_diff:.2e})")
+
+
+if __name__ == "__main__":
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+
+    onx = convert_sklearn(
+        model,
+        initial_types=[("X", FloatTensorType([None, len(FEATURE_NAMES)]))],
+        # plain probability tensor instead of a list of dicts
+        options={"zipmap": False}
+    )
+    onnx_bytes = onx.SerializeToString()
+
+    # Only write the file diabetes_tool will serve once it checks out
+    check_parity(model, onnx_bytes)
+
+    with open(ONNX_MODEL_PATH, "wb") as f:
+        f.write(onnx_bytes)
+
+    print(f"✅ Exported {MODEL_PATH} -> {ONNX_MODEL_PATH}")
@@ -1,7 +1,11 @@
+import os
 import pickle
-import pandas as pd
+import threading
+import numpy as np
+from functools import lru_cache
 
 MODEL_PATH = "diabetes_model.pkl"
+ONNX_MODEL_PATH = "diabetes_model.onnx"
 
 FEATURE_NAMES = [
     "Pregnancies",
@@ -14,9 +18,84 @@ FEATURE_NAMES = [
     "Age"
 ]
 
+def _load_onnx_session():
+    """
+    Open the ONNX export if present; onnxruntime is optional and only
+    imported when there is a model for it to serve
+    """
+    if not os.path.exists(ONNX_MODEL_PATH):
+        return None
+
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return None
+
+    so = ort.SessionOptions()
+    so.intra_op_num_threads = 1
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(
+        ONNX_MODEL_PATH,
+        sess_options=so,
+        providers=["CPUExecutionProvider"]
+    )
+
 # Load model once (important)
-with open(MODEL_PATH, "rb") as f:
-    model = pickle.load(f)
+# Prefer the ONNX export (see convert_to_onnx.py), fall back to sklearn
+session = _load_onnx_session()
+model = None
+
+if session is not None:
+    _INPUT_NAME = session.get_inputs()[0].name
+else:
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+
+    # Model is a Pipeline fit on a DataFrame. Pipeline.feature_names_in_ is
+    # a read-only view of its first step, so clear the fitted names on the
+    # steps themselves; raw arrays are then accepted without sklearn's
+    # feature-name warning
+    for _, step in getattr(model, "steps", [(None, model)]):
+        if getattr(step, "feature_names_in_", None) is not None:
+            step.feature_names_in_ = None
+
+# Reusable input row (shared across threads, so guard it)
+_BUF = np.empty(
+    (1, len(FEATURE_NAMES)),
+    dtype=np.float32 if session is not None else np.float64
+)
+_BUF_LOCK = threading.Lock()
+
+@lru_cache(maxsize=2048)
+def _predict_cached(
+    pregnancies: int,
+    glucose: float,
+    blood_pressure: float,
+    skin_thickness: float,
+    insulin: float,
+    bmi: float,
+    dpf: float,
+    age: int
+) -> tuple:
+    with _BUF_LOCK:
+        _BUF[0, 0] = pregnancies
+        _BUF[0, 1] = glucose
+        _BUF[0, 2] = blood_pressure
+        _BUF[0, 3] = skin_thickness
+        _BUF[0, 4] = insulin
+        _BUF[0, 5] = bmi
+        _BUF[0, 6] = dpf
+        _BUF[0, 7] = age
+
+        if session is not None:
+            labels, probabilities = session.run(None, {_INPUT_NAME: _BUF})
+            prediction = labels[0]
+            probability = probabilities[0][1]
+        else:
+            prediction = model.predict(_BUF)[0]
+            probability = model.predict_proba(_BUF)[0][1]
+
+    return int(prediction), round(float(probability), 3)
 
 def predict_diabetes_tool(
     pregnancies: int,
@@ -30,17 +109,21 @@ def predict_diabetes_tool(
 ) -> dict:
     """
     Predict diabetes using trained ML model
+    (inputs are rounded so repeat submissions hit the cache)
     """
-    input_df = pd.DataFrame([[
-        pregnancies, glucose, blood_pressure,
-        skin_thickness, insulin, bmi, dpf, age
-    ]], columns=FEATURE_NAMES)
-
-    prediction = model.predict(input_df)[0]
-    probability = model.predict_proba(input_df)[0][1]
+    prediction, probability = _predict_cached(
+        int(round(float(pregnancies))),
+        round(float(glucose), 1),
+        round(float(blood_pressure), 1),
+        round(float(skin_thickness), 1),
+        round(float(insulin), 1),
+        round(float(bmi), 2),
+        round(float(dpf), 3),
+        int(round(float(age)))
+    )
 
     return {
-        "prediction": int(prediction),
+        "prediction": prediction,
         "diabetes": "Yes" if prediction == 1 else "No",
-        "probability": round(float(probability), 3)
+        "probability": probability
     }
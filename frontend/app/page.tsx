@@ -17,6 +17,14 @@ interface Chat {
 // WebSocket URL - update if your backend runs on a different port
 const WS_URL = 'ws://localhost:8003/ws/chat'
 
+// The server coalesces pending frames into a JSON array;
+// hand each element to the per-message handler
+const forEachFrame = (handleFrame: (message: WebSocketMessage) => void) =>
+    (payload: WebSocketMessage | WebSocketMessage[]) => {
+        const frames = Array.isArray(payload) ? payload : [payload]
+        frames.forEach(handleFrame)
+    }
+
 export default function Home() {
     const [chats, setChats] = useState<Chat[]>([])
     const [activeChat, setActiveChat] = useState<string | null>(null)
@@ -99,7 +107,7 @@ export default function Home() {
                 console.log('❌ Disconnected from WebSocket')
                 setIsConnected(false)
             },
-            onMessage: (message: WebSocketMessage) => {
+            onMessage: forEachFrame((message: WebSocketMessage) => {
                 console.log('📨 Received message:', message)
 
                 const currentActiveChat = activeChatRef.current
@@ -445,7 +453,7 @@ export default function Home() {
                     }
                     setIsTyping(false)
                 }
-            },
+            }),
             onComplete: () => {
                 console.log('✅ Message stream completed')
                 setIsTyping(false)
@@ -1,7 +1,10 @@
 import os
+import asyncio
+import httpx
 import requests
 from typing import List
-from pypdf import PdfReader
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
@@ -16,6 +19,32 @@ HEADERS = {
     "Authorization": f"Bearer {JINA_API_KEY}"
 }
 
+EMBED_BATCH_SIZE = 64
+EMBED_MAX_CONCURRENCY = 8
+
+# Retry policy shared by the sync session and the async client
+EMBED_RETRIES = 3
+EMBED_BACKOFF_SECONDS = 0.2
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Shared sync session (keep-alive connection pool, retries on throttling)
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_session.mount("https://", HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=EMBED_RETRIES,
+        backoff_factor=EMBED_BACKOFF_SECONDS,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None  # embeddings POST is safe to retry
+    )
+))
+
+# Shared async client (keep-alive connection pool)
+_async_client = httpx.AsyncClient(headers=HEADERS, timeout=30)
+_async_semaphore = asyncio.Semaphore(EMBED_MAX_CONCURRENCY)
+
 # -------------------------------------------------
 # PDF Text Extraction
 # -------------------------------------------------
@@ -23,15 +52,18 @@ def extract_text_from_pdf(file_path: str) -> str:
     """
     Extract all text from a PDF file
     """
+    # Imported here: only /ingest needs it, retrieval loads this module too
+    from pypdf import PdfReader
+
     reader = PdfReader(file_path)
-    text = ""
+    parts = []
 
     for page in reader.pages:
         page_text = page.extract_text()
         if page_text:
-            text += page_text + "\n"
+            parts.append(page_text)
 
-    return text.strip()
+    return "\n".join(parts).strip()
 
 # -------------------------------------------------
 # Text Chunking with Overlap
@@ -44,36 +76,35 @@ def chunk_text(
     """
     Split text into overlapping chunks (word-based)
     """
-    words = text.split()
-    chunks = []
+    if overlap >= chunk_size:
+        raise ValueError("overlap must be smaller than chunk_size")
 
-    start = 0
-    while start < len(words):
-        end = start + chunk_size
-        chunk = " ".join(words[start:end])
-        chunks.append(chunk)
-        start += chunk_size - overlap
+    words = text.split()
+    step = chunk_size - overlap
 
-    return chunks
+    return [
+        " ".join(words[start:start + chunk_size])
+        for start in range(0, len(words), step)
+    ]
 
 # -------------------------------------------------
 # Jina Embeddings
 # -------------------------------------------------
-def embed_texts_jina(texts: List[str]) -> List[List[float]]:
-    """
-    Generate embeddings using Jina Embeddings v4
-    """
-    payload = {
+def _embedding_payload(texts: List[str]) -> dict:
+    return {
         "model": "jina-embeddings-v4",
         "task": "text-matching",
         "dimensions": 1024,
         "input": [{"text": t} for t in texts]
     }
 
-    response = requests.post(
+def embed_texts_jina(texts: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings using Jina Embeddings v4
+    """
+    response = _session.post(
         JINA_EMBEDDING_URL,
-        headers=HEADERS,
-        json=payload,
+        json=_embedding_payload(texts),
         timeout=30
     )
 
@@ -81,3 +112,41 @@ def embed_texts_jina(texts: List[str]) -> List[List[float]]:
     result = response.json()
 
     return [item["embedding"] for item in result["data"]]
+
+async def _embed_batch_async(texts: List[str]) -> List[List[float]]:
+    for attempt in range(EMBED_RETRIES + 1):
+        async with _async_semaphore:
+            response = await _async_client.post(
+                JINA_EMBEDDING_URL,
+                json=_embedding_payload(texts)
+            )
+
+        if response.status_code not in RETRY_STATUSES or attempt == EMBED_RETRIES:
+            break
+
+        # Back off outside the semaphore so other batches keep going;
+        # honor Retry-After when Jina sends one
+        retry_after = response.headers.get("Retry-After", "")
+        delay = (
+            float(retry_after) if retry_after.isdigit()
+            else EMBED_BACKOFF_SECONDS * 2 ** attempt
+        )
+        await asyncio.sleep(delay)
+
+    response.raise_for_status()
+    result = response.json()
+
+    return [item["embedding"] for item in result["data"]]
+
+async def aembed_texts_jina(texts: List[str]) -> List[List[float]]:
+    """
+    Async variant of embed_texts_jina for large inputs:
+    sends batches of EMBED_BATCH_SIZE concurrently, keeps input order
+    """
+    batches = [
+        texts[i:i + EMBED_BATCH_SIZE]
+        for i in range(0, len(texts), EMBED_BATCH_SIZE)
+    ]
+    results = await asyncio.gather(*[_embed_batch_async(b) for b in batches])
+
+    return [embedding for batch in results for embedding in batch]
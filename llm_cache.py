@@ -0,0 +1,166 @@
+import time
+import asyncio
+import hashlib
+import orjson
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+from retrieval_tool import index, embed_query_cached
+
+# -------------------------------------------------
+# Cache Settings
+# -------------------------------------------------
+CACHE_TTL_SECONDS = 3600
+EXACT_CACHE_SIZE = 1024
+
+SEMANTIC_NAMESPACE = "llm-cache"
+SEMANTIC_THRESHOLD = 0.92
+SEMANTIC_TOP_K = 5
+
+# key -> (timestamp, response)
+_exact_cache: "OrderedDict[str, tuple]" = OrderedDict()
+# pending semantic upserts (held so they aren't garbage-collected)
+_background_tasks: set = set()
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def _to_jsonable(obj: Any) -> Any:
+    # Assistant messages from the SDK are Pydantic models; mode="json" lets
+    # pydantic-core produce JSON-native values directly
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True)
+    return str(obj)
+
+
+def _cache_key(messages: List[Any], tools_json: bytes, model: str) -> str:
+    hasher = hashlib.sha256(model.encode())
+    hasher.update(tools_json)
+    hasher.update(orjson.dumps(
+        messages,
+        default=_to_jsonable,
+        option=orjson.OPT_SORT_KEYS
+    ))
+    return hasher.hexdigest()
+
+
+def _first_user_turn(messages: List[Any]) -> Optional[str]:
+    """
+    Return the user text only for the opening turn of a conversation
+    (system prompt + one user message). Later turns depend on history the
+    semantic key cannot see, so they are only cached exactly
+    """
+    if len(messages) != 2:
+        return None
+
+    last = messages[-1]
+    if isinstance(last, dict) and last.get("role") == "user":
+        return last["content"]
+    return None
+
+
+def _semantic_lookup(user_message: str) -> Optional[str]:
+    try:
+        result = index.query(
+            vector=list(embed_query_cached(user_message)),
+            top_k=SEMANTIC_TOP_K,
+            include_metadata=True,
+            namespace=SEMANTIC_NAMESPACE
+        )
+    except Exception as e:
+        print(f"Semantic cache lookup failed: {e}")
+        return None
+
+    response = None
+    expired = []
+    for match in result["matches"]:
+        metadata = match["metadata"]
+        if time.time() - metadata.get("ts", 0) >= CACHE_TTL_SECONDS:
+            expired.append(match["id"])
+        elif response is None and match["score"] >= SEMANTIC_THRESHOLD:
+            response = metadata.get("response")
+
+    if expired:
+        try:
+            index.delete(ids=expired, namespace=SEMANTIC_NAMESPACE)
+        except Exception as e:
+            print(f"Semantic cache cleanup failed: {e}")
+
+    return response
+
+
+def _semantic_store(key: str, user_message: str, response: str, ts: float) -> None:
+    try:
+        index.upsert(
+            vectors=[{
+                "id": key,
+                "values": list(embed_query_cached(user_message)),
+                "metadata": {"response": response, "ts": ts}
+            }],
+            namespace=SEMANTIC_NAMESPACE
+        )
+    except Exception as e:
+        print(f"Semantic cache store failed: {e}")
+
+
+# -------------------------------------------------
+# Exact + Semantic Lookup
+# -------------------------------------------------
+async def get_cached_response(
+    messages: List[Any],
+    tools_json: bytes,
+    model: str
+) -> Optional[str]:
+    """
+    Return a cached assistant reply for this conversation, if any
+    (tools_json: the tool schemas, pre-serialized by the caller)
+    """
+    key = _cache_key(messages, tools_json, model)
+
+    # 1. Exact match
+    hit = _exact_cache.get(key)
+    if hit:
+        ts, response = hit
+        if time.time() - ts < CACHE_TTL_SECONDS:
+            _exact_cache.move_to_end(key)
+            return response
+        del _exact_cache[key]
+
+    # 2. Semantic match on the opening user turn (network, off the loop)
+    user_message = _first_user_turn(messages)
+    if not user_message:
+        return None
+
+    return await asyncio.to_thread(_semantic_lookup, user_message)
+
+
+def store_cached_response(
+    messages: List[Any],
+    tools_json: bytes,
+    model: str,
+    response: str
+) -> None:
+    """
+    Cache a final assistant reply (never call this for tool_calls).
+    Only opening turns answered without tools are cached semantically;
+    everything else is specific to its history or tool inputs.
+    Call from the event loop: the semantic upsert runs as a background task
+    """
+    key = _cache_key(messages, tools_json, model)
+    now = time.time()
+
+    _exact_cache[key] = (now, response)
+    _exact_cache.move_to_end(key)
+    while len(_exact_cache) > EXACT_CACHE_SIZE:
+        _exact_cache.popitem(last=False)
+
+    user_message = _first_user_turn(messages)
+    if not user_message:
+        return
+
+    # Upsert in the background so the reply isn't held up
+    task = asyncio.create_task(
+        asyncio.to_thread(_semantic_store, key, user_message, response, now)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
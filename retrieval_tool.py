@@ -1,5 +1,11 @@
 import os
+import time
+import asyncio
+import threading
+from functools import lru_cache
 from typing import List, Dict
+
+import numpy as np
 from pinecone import Pinecone
 from jina_vector_utils import embed_texts_jina
 from dotenv import load_dotenv
@@ -12,35 +18,105 @@ pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 INDEX_NAME = os.getenv("PINECONE_INDEX")
 index = pc.Index(INDEX_NAME)
 
+# -------------------------------------------------
+# Query Caches
+# -------------------------------------------------
+EMBEDDING_DIMENSION = 1024
+
+RECENT_CAPACITY = 256
+RECENT_THRESHOLD = 0.97
+RECENT_TTL_SECONDS = 300
+
+# Ring buffer of recent L2-normalized query embeddings and their Pinecone
+# results; cosine similarity against all of them is a single float32 GEMV
+_recent_vecs = np.zeros((RECENT_CAPACITY, EMBEDDING_DIMENSION), dtype=np.float32)
+_recent_entries: List = [None] * RECENT_CAPACITY  # (top_k, source, ts, results)
+_recent_idx = 0
+_recent_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def embed_query_cached(query: str) -> tuple:
+    """
+    Embed a single query string, memoized on the exact text
+    """
+    return tuple(embed_texts_jina([query])[0])
+
+
+def _normalize(vec: np.ndarray) -> np.ndarray | None:
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else None
+
+
+def _lookup_recent(vec: np.ndarray, top_k: int, source: str | None):
+    with _recent_lock:
+        sims = _recent_vecs @ vec
+        best = int(sims.argmax())
+        if sims[best] < RECENT_THRESHOLD:
+            return None
+
+        # Best match first; entries must also share top_k and source
+        candidates = np.flatnonzero(sims >= RECENT_THRESHOLD)
+        for i in candidates[np.argsort(-sims[candidates])]:
+            entry = _recent_entries[i]
+            if (
+                entry
+                and entry[0] == top_k
+                and entry[1] == source
+                and time.time() - entry[2] < RECENT_TTL_SECONDS
+            ):
+                return entry[3]
+
+    return None
+
+
+def _store_recent(vec: np.ndarray, top_k: int, source: str | None, results: List[Dict]):
+    global _recent_idx
+
+    with _recent_lock:
+        slot = _recent_idx % RECENT_CAPACITY
+        _recent_vecs[slot] = vec
+        _recent_entries[slot] = (top_k, source, time.time(), results)
+        _recent_idx += 1
+
 # -------------------------------------------------
 # Retrieval Function (TOOL)
 # -------------------------------------------------
-def retrieve_documents_tool(
+async def retrieve_documents_tool(
     query: str,
     top_k: int = 5,
     source: str | None = None
 ) -> List[Dict]:
     """
     Retrieve relevant document chunks from Pinecone
+    (blocking network calls run in a worker thread)
     """
 
-    # 1. Embed the query
-    query_embedding = embed_texts_jina([query])[0]
+    # 1. Embed the query (exact-match cache)
+    query_embedding = await asyncio.to_thread(embed_query_cached, query)
+    query_vec = _normalize(np.asarray(query_embedding, dtype=np.float32))
 
-    # 2. Optional metadata filter
+    # 2. Reuse results of a near-identical recent query
+    if query_vec is not None:
+        cached = _lookup_recent(query_vec, top_k, source)
+        if cached is not None:
+            return cached
+
+    # 3. Optional metadata filter
     filter_query = {}
     if source:
         filter_query["source"] = source
 
-    # 3. Query Pinecone
-    response = index.query(
-        vector=query_embedding,
+    # 4. Query Pinecone
+    response = await asyncio.to_thread(
+        index.query,
+        vector=list(query_embedding),
         top_k=top_k,
         include_metadata=True,
         filter=filter_query if filter_query else None
     )
 
-    # 4. Format results
+    # 5. Format results
     results = []
     for match in response["matches"]:
         results.append({
@@ -51,4 +127,7 @@ def retrieve_documents_tool(
             "source": match["metadata"].get("source")
         })
 
+    if query_vec is not None:
+        _store_recent(query_vec, top_k, source, results)
+
     return results